@@ -1,19 +1,38 @@
+import errno
+import functools
+import os
 import re
-import shutil
+import secrets
 import tempfile
 import textwrap
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import nullcontext
 from pathlib import Path
 from urllib.parse import unquote
 
 import requests
+from requests.adapters import HTTPAdapter
 from rich.console import Console
-from rich.progress import Progress, BarColumn, DownloadColumn, TextColumn, TimeRemainingColumn, TransferSpeedColumn
 from rich.prompt import Prompt
 import subprocess
 
 console = Console()
 
+MAX_PARALLEL_DOWNLOADS = 4
+PROGRESS_UPDATE_BYTES = 1 << 20
+PROGRESS_UPDATE_INTERVAL = 0.1  # seconds
+UNSAFE_FILENAME_CHARS = re.compile(r'[\\/:*?"<>|]')
+_cancelled = threading.Event()  # set on Ctrl+C so worker threads stop streaming
+_names_lock = threading.Lock()  # guards the batch's set of taken file names
+
+SESSION = requests.Session()
+SESSION.mount("https://", HTTPAdapter(pool_connections=8, pool_maxsize=16))
+
+@functools.lru_cache(maxsize=1)
 def is_aria2c_available() -> bool:
+    # spawns aria2c, and it won't be installed or removed while we run
     try:
         subprocess.run(
             ["aria2c", "--version"], 
@@ -27,42 +46,97 @@ def is_aria2c_available() -> bool:
 
 
 def download_comics(comic_links, download_path, verbose=False, prompt=True, use_aria2c=False):
-    for i, (url, title) in enumerate(comic_links.items()):
-        if url.startswith("_MEDIAFIRE_"):
-            mediafire_url = url[url.index('http'):]
+    direct_links = []
+    for url, title, is_mediafire in comic_links:
+        if is_mediafire:
             console.print(f"""{title}:
 Please download from the following Mediafire link:
-[link={mediafire_url}]{mediafire_url}[/link]""")
+[link={url}]{url}[/link]""")
             continue
-        
+        direct_links.append((url, title))
+
+    # links without an extension redirect to the real file, resolve them all at once
+    unresolved = [url for url, _ in direct_links if "." not in url.rpartition("/")[-1]]
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        resolved = dict(zip(unresolved, executor.map(resolve_url, unresolved)))
+
+    # listed once, create_file_name keeps it up to date with the names handed out below
+    existing = set(os.listdir(download_path))
+    jobs = []
+    for url, title in direct_links:
         if verbose:
             console.print(f"Downloading {title} from {url}")
 
-        if "." not in url.rpartition("/")[-1]:
-            url = requests.head(url, allow_redirects=True).url
+        # asked first, a skipped comic must not reserve a name in existing
+        if prompt and "n" in Prompt.ask(f"Download '{title}'?", choices=["y", "n"], default="y").lower():
+            continue
+
+        url = resolved.get(url, url)
         
         file_name = safe_filename(unquote(url.rpartition("/")[-1]))
         
         if not use_aria2c: # apply create_file_name if not using aria
-            file_name = create_file_name(str(download_path / file_name))
+            file_name = create_file_name(str(download_path / file_name), existing)
         else:
             file_name = str(download_path / file_name) #full path string for aria
-        
-        if prompt and "n" in Prompt.ask(f"Download '{title}'?", choices=["y", "n"], default="y").lower():
-            continue
 
-        download_file(
-            url, 
-            filename=Path(file_name),
-            verbose=True, 
-            transient=True,
-            use_aria2c=use_aria2c
-        )
-        console.print(f"'{title}' downloaded.")
+        jobs.append((url, Path(file_name), title))
+
+    if use_aria2c and is_aria2c_available():
+        # aria2c already splits each file into segments, run them one at a time
+        for url, file_name, title in jobs:
+            download_file(url, filename=file_name, verbose=True, transient=True, use_aria2c=True)
+            console.print(f"'{title}' downloaded.")
+        return
+
+    progress = create_progress(transient=True)
+    with progress, ThreadPoolExecutor(max_workers=MAX_PARALLEL_DOWNLOADS) as executor:
+        futures = {
+            executor.submit(download_file, url, filename=file_name, verbose=True, progress=progress, existing=existing): title
+            for url, file_name, title in jobs
+        }
+        try:
+            for future in as_completed(futures):
+                title = futures[future]
+                try:
+                    future.result()
+                except (requests.RequestException, OSError) as e:
+                    progress.console.print(f"[bold red]Failed to download '{title}': {e}[/bold red]")
+                    continue
+                progress.console.print(f"'{title}' downloaded.")
+        except KeyboardInterrupt:
+            _cancelled.set()
+            executor.shutdown(wait=True, cancel_futures=True)
+            _cancelled.clear()
+            raise
+
+def resolve_url(url):
+    try:
+        return SESSION.head(url, allow_redirects=True).url
+    except requests.RequestException as e:
+        # one bad link shouldn't stop the batch, the download itself will report it if it fails too
+        console.print(f"[yellow]Could not resolve {url}: {e}. Trying it as is.[/yellow]")
+        return url
+
+def create_progress(verbose=True, transient=False):
+    from rich.progress import Progress, BarColumn, DownloadColumn, TextColumn, TimeRemainingColumn, TransferSpeedColumn
 
-def download_file(url, filename=None, chunk_size=1024, verbose=False, transient=False, use_aria2c=False):
+    return Progress(
+        TextColumn("[bold cyan]{task.description}[/bold cyan]"),
+        BarColumn(bar_width=None), 
+        "[progress.percentage]{task.percentage:>3.1f}%",
+        "•",
+        DownloadColumn(binary_units=True),
+        "•",
+        TransferSpeedColumn(),
+        "•",
+        TimeRemainingColumn(compact=True),
+        disable=not verbose,
+        transient=transient
+    )
+
+def download_file(url, filename=None, chunk_size=1 << 18, verbose=False, transient=False, use_aria2c=False, progress=None, existing=None):
     destination = filename
-    temp_file = Path(tempfile.gettempdir()) / filename.name
 
     if use_aria2c and is_aria2c_available():
         try:
@@ -86,58 +160,107 @@ def download_file(url, filename=None, chunk_size=1024, verbose=False, transient=
         except FileNotFoundError:
             console.print("[bold red]aria2c not found. Falling back to requests download.[/bold red]")
 
-    response = requests.get(url, stream=True)
+    response = SESSION.get(url, stream=True)
+    response.raise_for_status()
 
     if response.history:
-        filename = Path(unquote(Path(response.url).name))
+        # the server picked the name, it has to be made unique against the rest of the batch too
+        redirected = filename.with_name(safe_filename(unquote(Path(response.url).name)))
+        with _names_lock:
+            filename = Path(create_file_name(str(redirected), existing))
     destination = filename
-    temp_file = Path(tempfile.gettempdir()) / filename.name
+    temp_file = temp_path_for(destination)
     
     total_size_in_bytes = int(response.headers.get('content-length', 0))
-    
-    if verbose:
-        console.print(f"[bold cyan]{destination.name}[/bold cyan]")
-
-    with open(temp_file, "wb") as file:
-        progress = Progress(
-            BarColumn(bar_width=None), 
-            "[progress.percentage]{task.percentage:>3.1f}%",
-            "•",
-            DownloadColumn(binary_units=True),
-            "•",
-            TransferSpeedColumn(),
-            "•",
-            TimeRemainingColumn(compact=True),
-            disable=not verbose,
-            transient=transient
-        )
-        
-        with progress:
-            task_id = progress.add_task(
-                description="", 
-                total=total_size_in_bytes,
-                visible=verbose
-            )
+
+    # a progress passed in is shared with other downloads and owned by the caller
+    own_progress = progress is None
+    if own_progress:
+        progress = create_progress(verbose=verbose, transient=transient)
+
+    # fit the name to the terminal once here, not on every chunk
+    description = textwrap.shorten(destination.name, width=max(console.width // 3, 20), placeholder="...")
+
+    # temp files can sit next to the comics, don't leave a partial one behind on failure or Ctrl+C
+    try:
+        # buffered on purpose: BufferedWriter passes chunks larger than its buffer straight to the OS,
+        # and unlike a raw FileIO it never returns a short write
+        with open(temp_file, "xb") as file:
+            preallocated = False
+            if total_size_in_bytes and hasattr(os, "posix_fallocate"):
+                try:
+                    os.posix_fallocate(file.fileno(), 0, total_size_in_bytes)
+                    preallocated = True
+                except OSError as e:
+                    if e.errno == errno.ENOSPC:
+                        raise
+
+            with progress if own_progress else nullcontext():
+                task_id = progress.add_task(
+                    description=description, 
+                    total=total_size_in_bytes,
+                    visible=verbose
+                )
             
-            for chunk in response.iter_content(chunk_size=chunk_size):
-                file.write(chunk)
-                progress.update(task_id, advance=len(chunk))
-                
-    temp_file.replace(destination)
+                # Rich redraws at 10 Hz anyway, batch the updates
+                pending = 0
+                last_update = time.monotonic()
+                for chunk in response.iter_content(chunk_size=chunk_size):
+                    if _cancelled.is_set():
+                        raise KeyboardInterrupt
+                    file.write(chunk)
+                    pending += len(chunk)
+                    now = time.monotonic()
+                    if pending >= PROGRESS_UPDATE_BYTES or now - last_update > PROGRESS_UPDATE_INTERVAL:
+                        progress.update(task_id, advance=pending)
+                        pending = 0
+                        last_update = now
+                progress.update(task_id, advance=pending)
+
+            if preallocated:
+                # content-length may not match what was written (compressed body, dropped connection)
+                file.truncate(file.tell())
+
+            if hasattr(os, "posix_fadvise"):
+                # the finished comic is not read back, keep it from evicting the page cache
+                file.flush()
+                os.posix_fadvise(file.fileno(), 0, 0, os.POSIX_FADV_DONTNEED)
+
+        temp_file.replace(destination)
+    except BaseException:
+        temp_file.unlink(missing_ok=True)
+        raise
+
+def temp_path_for(destination: Path) -> Path:
+    temp_dir = Path(tempfile.gettempdir())
+    # replace() across filesystems (e.g. /tmp on tmpfs) is a full copy, stay next to the destination then
+    if os.stat(temp_dir).st_dev != os.stat(destination.parent).st_dev:
+        temp_dir = destination.parent
+    # random part so parallel downloads of the same name never share a temp file, opened with "xb"
+    return temp_dir / f"{destination.name}.{secrets.token_hex(4)}.part"
 
 def safe_filename(filename: str) -> str:
-    return re.sub(r"[\\/\\:\\*\\?\\\"<>\\|]", "", filename)
+    return UNSAFE_FILENAME_CHARS.sub("", filename)
 
-def create_file_name(filename: str) -> str:
+def create_file_name(filename: str, existing=None) -> str:
+    # existing: names already in the target directory, the returned name is added to it
     filename = filename.replace("\\\\", "/")
-    if not Path(filename).exists():
-        return filename
-    
     if "/" in filename:
         directories, _, filename = filename.rpartition("/") 
         directories += "/"
     else:
         directories = ""
+
+    if existing is None:
+        try:
+            existing = set(os.listdir(directories or "."))
+        except FileNotFoundError:
+            existing = set()  # nothing to collide with yet, the name is returned as is
+
+    # exists() catches files another process created since the directory was listed
+    if filename not in existing and not Path(f"{directories}{filename}").exists():
+        existing.add(filename)
+        return f"{directories}{filename}"
     
     if "." in filename:
         stem, _, suffix = filename.rpartition(".")
@@ -145,7 +268,13 @@ def create_file_name(filename: str) -> str:
     else:
         stem, suffix = filename, ""
 
+    pattern = re.compile(rf"{re.escape(stem)} \((\d+)\){re.escape(suffix)}")
     num = 0
+    for name in existing:
+        match = pattern.fullmatch(name)
+        if match:
+            num = max(num, int(match.group(1)) + 1)
     while Path(f"{directories}{stem} ({num}){suffix}").exists():
         num += 1
+    existing.add(f"{stem} ({num}){suffix}")
     return f"{directories}{stem} ({num}){suffix}"
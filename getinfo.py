@@ -1,8 +1,25 @@
+import math
+import re
+from concurrent.futures import ThreadPoolExecutor
+
 import requests
-from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+from bs4 import BeautifulSoup, SoupStrainer
 from rich.console import Console
 
 BASE_URL = "https://getcomics.org"
+PAGE_SIZE = 10  # posts per search results page
+PAGE_BATCH = 3  # search pages requested at once
+MAX_WORKERS = 10  # concurrent requests against getcomics
+
+# only the tags we read are built into the tree, scripts and styles are skipped
+ARTICLE_STRAINER = SoupStrainer("article")
+LINK_STRAINER = SoupStrainer("a", href=True)
+
+DIRECT_HOSTS = ("getcomics.org/download", "getcomics.info/download", "getcomics.org/dlds/")
+DIRECT_LINK_SELECTOR = ", ".join(f'a[href*="{host}"]' for host in DIRECT_HOSTS)
+DIRECT_TEXT_RE = re.compile(r"DOWNLOAD NOW|MAIN SERVER", re.IGNORECASE)
+MEDIAFIRE_RE = re.compile(r"MEDIAFIRE", re.IGNORECASE)
 
 console = Console()
 
@@ -13,65 +30,87 @@ class GetComics:
         self.num_results_desired = results
         self.verbose = verbose
         self.page = 1
-        self.page_links = {}
-        self.comic_links = {}
+        self.page_size = 0
+        self.last_page_reached = False
+        self.page_links = []
+        self.comic_links = []
+        self.session = requests.Session()
+        self.session.headers.update({
+            'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+            'Accept-Encoding': 'gzip, deflate',
+            'Accept-Language': 'en-US,en;q=0.9',
+        })
+        self.session.mount("https://", HTTPAdapter(pool_connections=8, pool_maxsize=16))
 
-    def find_pages(self, date=None):
-        url = f"{BASE_URL}/page/{self.page}?s={self.query}"
-        
+    def _fetch(self, url):
         try:
             if self.verbose:
                 console.print(f"Opening page {url}")
-            response = requests.get(url)
+            return self.session.get(url).content
         except Exception as e:
             console.print(f"Error contacting URL: {url}")
             console.print(e)
-            return
+            return None
+
+    def _fetch_all(self, urls):
+        with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+            return list(executor.map(self._fetch, urls))
+
+    def find_pages(self, date=None):
+        num_pages = max(1, math.ceil(int(self.num_results_desired) / PAGE_SIZE))
+        end_page = self.page + num_pages
+
+        while not self.last_page_reached and self.page < end_page:
+            pages = range(self.page, min(self.page + PAGE_BATCH, end_page))
+            urls = [f"{BASE_URL}/page/{page}?s={self.query}" for page in pages]
+
+            for content in self._fetch_all(urls):
+                if content is None:
+                    return
+
+                soup = BeautifulSoup(content, "lxml", parse_only=ARTICLE_STRAINER)
+                articles = soup.find_all("article")
+                if len(articles) == 0:
+                    self.last_page_reached = True
+                    return
+
+                for article in articles:
+                    title_tag = article.find("h1", {"class": "post-title"})
+                    title = title_tag.text
+                    link = title_tag.find("a")["href"]
+                    self.page_links.append((link, title))
 
-        soup = BeautifulSoup(response.text, "html.parser")
-        articles = soup.find_all("article")
-        if len(articles) == 0:
-            return
+                self.page += 1
 
-        for article in articles:
-            title_tag = article.find("h1", {"class": "post-title"})
-            title = title_tag.text
-            link = title_tag.find("a")["href"]
-            self.page_links[link] = title
-        
-        self.page += 1
+                # a page shorter than the ones before it is the last one, don't ask for the next
+                self.page_size = max(self.page_size, len(articles))
+                if len(articles) < self.page_size:
+                    self.last_page_reached = True
+                    return
 
     def get_download_links(self):
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
-        }
-        for url, title in self.page_links.items():
-            try:
-                if self.verbose:
-                    console.print(f"Opening page {url}")
-                response = requests.get(url, headers=headers)
-            except Exception as e:
-                console.print(f"Error contacting URL: {url}")
-                console.print(e)
+        urls = [url for url, _ in self.page_links]
+        for (url, title), content in zip(self.page_links, self._fetch_all(urls)):
+            if content is None:
                 continue
 
-            soup = BeautifulSoup(response.text, "html.parser")
-            all_links = soup.find_all("a", href=True)
+            soup = BeautifulSoup(content, "lxml", parse_only=LINK_STRAINER)
+            seen = set()  # the same button can appear more than once on a page
             direct_links_found = False
-            for tag in all_links:
-                href = tag['href']
-                link_text = tag.get_text().upper()
-                link_title = tag.get('title', '').upper()
-                if "DOWNLOAD NOW" in link_text or "DOWNLOAD NOW" in link_title or "MAIN SERVER" in link_text:
-                    if "getcomics.org/download" in href or "getcomics.org/dlds/" in href:
-                        self.comic_links[href] = title
-                        direct_links_found = True
+            # the title attribute is a plain lookup, get_text() walks the subtree, so check it first
+            for tag in soup.select(DIRECT_LINK_SELECTOR):
+                attrs = tag.attrs
+                href = attrs['href']
+                if href not in seen and (DIRECT_TEXT_RE.search(attrs.get('title', '')) or DIRECT_TEXT_RE.search(tag.get_text())):
+                    seen.add(href)
+                    self.comic_links.append((href, title, False))
+                    direct_links_found = True
             if not direct_links_found:
-                for tag in all_links:
-                    href = tag['href']
-                    link_text = tag.get_text().upper()
-                    link_title = tag.get('title', '').upper()
-                    if "MEDIAFIRE" in link_text or "MEDIAFIRE" in link_title:
-                        self.comic_links[f"_MEDIAFIRE_{href}"] = title
+                for tag in soup.find_all("a", href=True):
+                    attrs = tag.attrs
+                    href = attrs['href']
+                    if href not in seen and (MEDIAFIRE_RE.search(attrs.get('title', '')) or MEDIAFIRE_RE.search(tag.get_text())):
+                        seen.add(href)
+                        self.comic_links.append((href, title, True))
             if not self.comic_links and self.verbose:
                 console.print(f"No link found: {url}")
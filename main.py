@@ -2,22 +2,17 @@
 import sys
 
 from rich.console import Console
-from rich.panel import Panel
 from rich.prompt import Prompt
 
-from getinfo import GetComics
-from download import download_comics
 from menu import parse_arguments, interactive_main_menu, show_interactive_menu
 
 console = Console()
 
-def main():
-    while True:
-        try:
-            console.clear()
-            console.print()
-            console.print("=" * 70)
-            console.print("""[bold purple]
+def print_banner():
+    console.clear()
+    console.print()
+    console.print("=" * 70)
+    console.print("""[bold purple]
       ____      _    ____                _                   
      / ___| ___| |_ / ___|___  _ __ ___ (_) ___ ___          
     | |  _ / _ \ __| |   / _ \| '_ ` _ \| |/ __/ __|         
@@ -28,18 +23,33 @@ def main():
     | |_| | (_) \ V  V /| | | | | (_) | (_| | (_| |  __/ |   
     |____/ \___/ \_/\_/ |_| |_|_|\___/ \__,_|\__,_|\___|_|  [/bold purple]
                         """)
-            console.print("    GetComicsDownloader v1.0 by UlucKaymak")
-            console.print()
-            console.print("=" * 70)
-            console.print()
+    console.print("    GetComicsDownloader v1.0 by UlucKaymak")
+    console.print()
+    console.print("=" * 70)
+    console.print()
+
+def main():
+    while True:
+        try:
+            # the banner clears the screen, draw it before parsing so the argument warnings stay visible
+            no_banner = "-nobanner" in sys.argv or "--nb" in sys.argv
+            # nothing to decorate when the output is piped or the banner was turned off
+            if sys.stdout.isatty() and not no_banner:
+                print_banner()
 
             args = parse_arguments()
+
             if args is None:
                 args = interactive_main_menu()
                 if args is None:
                     console.print("[yellow]Exiting.[/yellow]")
                     return
             
+            # requests and bs4 are only needed once there is something to search for,
+            # leaving them out keeps -h and the first menu prompt fast
+            from getinfo import GetComics
+            from download import download_comics
+
             if not args.download_path.exists():
                 args.download_path.mkdir(parents=True, exist_ok=True)
 
@@ -70,7 +80,7 @@ def main():
                     console.print("[yellow]Exiting. Bye![/yellow]")
                     return
 
-                download_comics(dict(selected_comics), args.download_path, args.verbose, prompt=False, use_aria2c=args.use_aria2c)
+                download_comics(selected_comics, args.download_path, args.verbose, prompt=False, use_aria2c=args.use_aria2c)
                 Prompt.ask("Press any key to return to the main menu")
                 break
 
@@ -1,79 +1,172 @@
 import argparse
+import atexit
+import copy
+import functools
 import sys
-from datetime import datetime
 from pathlib import Path
 import json
 import os
+import queue
+import re
 import subprocess
+import threading
 
 from rich.console import Console
-from rich.panel import Panel
 from rich.prompt import Prompt
-from rich.table import Table
+from rich.text import Text
 
-from download import is_aria2c_available
+try:
+    import orjson
+except ImportError:  # optional, the stdlib json module writes the same options
+    orjson = None
 
 console = Console()
 
 CONFIG_FILE = Path(".") / ".config.json"
 
+# shared by the command line, the interactive menu and the options menu
+DEFAULT_OPTIONS = {
+    "query": None,
+    "date": None,
+    "download_path": "Downloads/Comics",
+    "min": None,
+    "max": None,
+    "results": 15,
+    "verbose": False,
+    "use_aria2c": False,
+}
+_last_saved = None  # JSON most recently written by save_options
+_save_queue = queue.Queue()
+_save_thread = None
+
+if orjson is not None:
+    def _dumps(obj):
+        try:
+            return orjson.dumps(obj, option=orjson.OPT_INDENT_2)
+        except TypeError:  # orjson only takes 64-bit integers, json has no limit
+            return json.dumps(obj, indent=4).encode()
+    _loads = orjson.loads
+else:
+    def _dumps(obj):
+        return json.dumps(obj, indent=4).encode()
+    _loads = json.loads
+
+# parsed once instead of re-reading the markup for every row
+MEDIAFIRE_CELL = Text.from_markup("[yellow]Mediafire[/yellow]")
+DIRECT_CELL = Text.from_markup("[green]Direct[/green]")
+
+SELECTION_NUMBER_RE = re.compile(r"[0-9]+")
+
 def save_options(args):
-    with open(CONFIG_FILE, 'w') as f:
-        args_dict = vars(args)
-        if 'download_path' in args_dict and isinstance(args_dict['download_path'], Path):
-            args_dict['download_path'] = str(args_dict['download_path'])
-        json.dump(args_dict, f, indent=4)
-    console.print(f"[green]Options saved to {CONFIG_FILE}[/green]")
+    global _last_saved
+    # copy, vars() is the namespace itself and download_path must stay a Path for the caller
+    args_dict = dict(vars(args))
+    if 'download_path' in args_dict and isinstance(args_dict['download_path'], Path):
+        args_dict['download_path'] = str(args_dict['download_path'])
+    payload = _dumps(args_dict)
+    if payload == _last_saved:
+        return  # same value entered again or toggled back, the file is already up to date
+    _start_save_worker()
+    # set before queueing, otherwise a failed write could reset it before this line runs
+    _last_saved = payload
+    _save_queue.put(payload)  # written in the background, the prompt comes back right away
+    console.print(f"[green]Options queued for saving to {CONFIG_FILE}[/green]")
+
+def _start_save_worker():
+    global _save_thread
+    if _save_thread is None:
+        _save_thread = threading.Thread(target=_save_worker, daemon=True)
+        _save_thread.start()
+        atexit.register(_save_queue.join)  # don't lose the last change on exit
+
+def _save_worker():
+    global _last_saved
+    while True:
+        payload = _save_queue.get()
+        try:
+            CONFIG_FILE.write_bytes(payload)
+        except OSError as e:
+            # forget it, so saving the same options again retries instead of being skipped
+            if _last_saved == payload:
+                _last_saved = None
+            console.print(f"[bold red]Could not save options to {CONFIG_FILE}: {e}[/bold red]")
+        finally:
+            _load_options_cached.cache_clear()
+            _save_queue.task_done()
 
 def load_options():
-    if CONFIG_FILE.exists():
-        with open(CONFIG_FILE, 'r') as f:
-            try:
-                options = json.load(f)
-                if 'download_path' in options and isinstance(options['download_path'], str):
-                    options['download_path'] = Path(options['download_path'])
-                if 'use_aria2c' not in options:
-                    options['use_aria2c'] = False
-                return argparse.Namespace(**options)
-            except json.JSONDecodeError:
-                console.print(f"[yellow]Warning: Could not read config file {CONFIG_FILE}. Using default options.[/yellow]")
-                return None
-    return None
+    _save_queue.join()  # let pending saves land before reading the file back
+    if not CONFIG_FILE.exists():
+        return None
+    # keyed on mtime so edits made outside the program are still picked up
+    options = _load_options_cached((str(CONFIG_FILE), CONFIG_FILE.stat().st_mtime_ns))
+    # callers modify the namespace, hand out a copy
+    return copy.copy(options) if options is not None else None
+
+@functools.lru_cache(maxsize=1)
+def _load_options_cached(key):
+    try:
+        options = _loads(CONFIG_FILE.read_bytes())
+    except ValueError:  # json.JSONDecodeError and orjson.JSONDecodeError both subclass it
+        console.print(f"[yellow]Warning: Could not read config file {CONFIG_FILE}. Using default options.[/yellow]")
+        return None
+    if 'download_path' in options and isinstance(options['download_path'], str):
+        options['download_path'] = expand_path(options['download_path'])
+    options.setdefault('use_aria2c', DEFAULT_OPTIONS['use_aria2c'])
+    return argparse.Namespace(**options)
+
+# the schema never changes, build it once at import
+PARSER = argparse.ArgumentParser(
+    description="Search for and/or download content from getcomics.org."
+)
+PARSER.add_argument("query", type=str, nargs='?', default=DEFAULT_OPTIONS["query"], help="Search term for comics")
+
+PARSER.add_argument("-date", "--d", dest='date', type=str, default=DEFAULT_OPTIONS["date"], help="Get newer ones (YYYY)")
+PARSER.add_argument("-output", "--o", dest="download_path", type=str, default=DEFAULT_OPTIONS["download_path"], help='Download directory')
+PARSER.add_argument("-min", dest="min", type=int, default=DEFAULT_OPTIONS["min"], help="Minimum issue number")
+PARSER.add_argument("-max", dest="max", type=int, default=DEFAULT_OPTIONS["max"], help="Maximum issue number")
+PARSER.add_argument("-results", "--r", dest="results", type=int, default=DEFAULT_OPTIONS["results"], help="Number of results to show")
+PARSER.add_argument("-verbose", "--v", dest="verbose", action="store_true", default=DEFAULT_OPTIONS["verbose"], help="Detailed output")
+PARSER.add_argument("-aria2c", "--a", dest="use_aria2c", action="store_true", default=DEFAULT_OPTIONS["use_aria2c"], help="Use aria2c for downloads")
+PARSER.add_argument("-nobanner", "--nb", dest="no_banner", action="store_true", default=False, help="Don't clear the screen or show the banner")
 
 def parse_arguments():
     if len(sys.argv) == 1:
         return None  # if no arguments provided trigger the menu
+    # main() asks again after every search, parse and warn only once
+    return copy.copy(_parse_argv(tuple(sys.argv[1:])))
 
-    parser = argparse.ArgumentParser(
-        description="Search for and/or download content from getcomics.org."
-    )
-    parser.add_argument("query", type=str, nargs='?', default=None, help="Search term for comics")
-
-    parser.add_argument("-date", "--d", dest='date', type=str, default=None, help="Get newer ones (YYYY)")
-    parser.add_argument("-output", "--o", dest="download_path", type=str, default="Downloads/Comics", help='Download directory')
-    parser.add_argument("-min", dest="min", type=int, default=None, help="Minimum issue number")
-    parser.add_argument("-max", dest="max", type=int, default=None, help="Maximum issue number")
-    parser.add_argument("-results", "--r", dest="results", type=int, default=15, help="Number of results to show")
-    parser.add_argument("-verbose", "--v", dest="verbose", action="store_true", default=False, help="Detailed output")
-    parser.add_argument("-aria2c", "--a", dest="use_aria2c", action="store_true", default=False, help="Use aria2c for downloads")
-
-    args = parser.parse_args()
-    args.download_path = Path(args.download_path).expanduser()
+@functools.lru_cache(maxsize=1)
+def _parse_argv(argv):
+    args = PARSER.parse_args(list(argv))
+    args.download_path = expand_path(args.download_path)
     
     if args.date:
-        try:
-            args.date = datetime.strptime(args.date, "%Y").year
-        except:
+        args.date = parse_year(args.date)
+        if args.date is None:
             console.print("[yellow]Warning: Date format should be YYYY. Date filter disabled.[/yellow]")
-            args.date = None
 
     return args
 
+def expand_path(value):
+    # expanduser() looks up HOME or the passwd entry even when there is no "~" to expand
+    value = str(value)
+    return Path(value).expanduser() if value.startswith("~") else Path(value)
+
+def parse_year(value):
+    # a digit check is all "%Y" needs, strptime goes through _strptime's regex and locale setup
+    # isdigit() alone also passes digits like "¹⁹⁹⁹" that int() rejects
+    if len(value) == 4 and value.isascii() and value.isdigit() and 1900 <= int(value) <= 2999:
+        return int(value)
+    return None
+
 def show_interactive_menu(comic_links, search_term):
     if not comic_links:
         console.print(f"[bold red]No downloadable links found for '{search_term}'.[/bold red]")
         return []
 
+    from rich.table import Table
+
     console.clear()
     table = Table(
         title=f"""
@@ -86,12 +179,10 @@ def show_interactive_menu(comic_links, search_term):
     table.add_column("Comic Title", style="white")
     table.add_column("Source", width=12, justify="center")
 
-    comics_list = []
-    for i, (url, title) in enumerate(comic_links.items(), 1):
-        is_mediafire = url.startswith("_MEDIAFIRE_")
-        source_type = "[yellow]Mediafire[/yellow]" if is_mediafire else "[green]Direct[/green]"
-        table.add_row(str(i), title, source_type)
-        comics_list.append((url, title))
+    comics_list = list(comic_links)
+    add_row = table.add_row  # bound once, results can run into the hundreds
+    for i, (url, title, is_mediafire) in enumerate(comics_list, 1):
+        add_row(str(i), title, MEDIAFIRE_CELL if is_mediafire else DIRECT_CELL)
 
     console.print(table)
     
@@ -108,11 +199,8 @@ Enter numbers to download (e.g. [bold]1,3[/bold]), [bold]'a'[/bold] for all, [bo
     if choice.lower() == 'n':
         return "next"
     
-    try:
-        indices = [int(x.strip()) - 1 for x in choice.split(",") if x.strip().isdigit()]
-        return [comics_list[i] for i in indices if 0 <= i < len(comics_list)]
-    except:
-        return []
+    indices = [int(number) - 1 for number in SELECTION_NUMBER_RE.findall(choice)]
+    return [comics_list[i] for i in indices if 0 <= i < len(comics_list)]
 
 def interactive_main_menu():
     args = argparse.Namespace()
@@ -121,21 +209,18 @@ def interactive_main_menu():
     if loaded_args:
         args = loaded_args
 
-    args.query = None if not hasattr(args, 'query') else args.query
-    args.date = None if not hasattr(args, 'date') else args.date
-    if hasattr(args, 'download_path'):
-        args.download_path = Path(args.download_path).expanduser()
-    else:
-        args.download_path = Path("Downloads/Comics").expanduser()
-    args.min = None if not hasattr(args, 'min') else args.min
-    args.max = None if not hasattr(args, 'max') else args.max
-    args.results = 15 if not hasattr(args, 'results') else args.results
-    args.verbose = False if not hasattr(args, 'verbose') else args.verbose
-    args.use_aria2c = False if not hasattr(args, 'use_aria2c') else args.use_aria2c
+    for name, default in DEFAULT_OPTIONS.items():
+        setattr(args, name, getattr(args, name, default))
+    args.download_path = expand_path(args.download_path)
     
     while True:
         menu_choices = {"q": "Search by [bold]Q[/bold]uery", "o": "[bold]O[/bold]ptions"}
-        if args.use_aria2c and is_aria2c_available():
+        can_resume = False
+        if args.use_aria2c:
+            # download pulls in requests, only load it when aria2c is actually wanted
+            from download import is_aria2c_available
+            can_resume = is_aria2c_available()
+        if can_resume:
             menu_choices["c"] = "[bold]C[/bold]ontinue interrupted downloads"
         
         choice_str = ", or ".join(menu_choices.values())
@@ -147,7 +232,7 @@ def interactive_main_menu():
         elif choice.lower() == 'o':
             args = options_menu(args)
             continue 
-        elif choice.lower() == 'c' and args.use_aria2c and is_aria2c_available():
+        elif choice.lower() == 'c' and can_resume:
             handle_interrupted_downloads(args.download_path, args.verbose)
             Prompt.ask("Press any key to return to the main menu")
             continue
@@ -157,15 +242,18 @@ def interactive_main_menu():
 
 def options_menu(args):
     while True:
-        console.print("""
-[bold]Current Options:[/bold]""")
-        console.print(f"  [cyan]1. Date (YYYY):[/cyan] {args.date or 'Not set'}")
-        console.print(f"  [cyan]2. Download Path:[/cyan] {args.download_path}")
-        console.print(f"  [cyan]3. Min Issue:[/cyan] {args.min or 'Not set'}")
-        console.print(f"  [cyan]4. Max Issue:[/cyan] {args.max or 'Not set'}")
-        console.print(f"  [cyan]5. Results:[/cyan] {args.results}")
-        console.print(f"  [cyan]6. Display Log:[/cyan] {args.verbose}")
-        console.print(f"  [cyan]7. Use aria2c:[/cyan] {args.use_aria2c}")
+        # one print, so the console lock and the terminal write happen once per redraw
+        console.print("\n".join([
+            "",
+            "[bold]Current Options:[/bold]",
+            f"  [cyan]1. Date (YYYY):[/cyan] {args.date or 'Not set'}",
+            f"  [cyan]2. Download Path:[/cyan] {args.download_path}",
+            f"  [cyan]3. Min Issue:[/cyan] {args.min or 'Not set'}",
+            f"  [cyan]4. Max Issue:[/cyan] {args.max or 'Not set'}",
+            f"  [cyan]5. Results:[/cyan] {args.results}",
+            f"  [cyan]6. Display Log:[/cyan] {args.verbose}",
+            f"  [cyan]7. Use aria2c:[/cyan] {args.use_aria2c}",
+        ]))
 
         choice = Prompt.ask(
             """Choose an option to change, or press [bold]b[/bold]ack""",
@@ -177,14 +265,12 @@ def options_menu(args):
         
         if choice == '1':
             date_str = Prompt.ask("Enter date (YYYY)", default=str(args.date) if args.date else "")
-            try:
-                args.date = datetime.strptime(date_str, "%Y").year
-            except:
+            args.date = parse_year(date_str)
+            if args.date is None:
                 console.print("[yellow]Warning: Date format should be YYYY. Date filter disabled.[/yellow]")
-                args.date = None
             save_options(args)
         elif choice == '2':
-            args.download_path = Path(Prompt.ask("Enter download path", default=str(args.download_path))).expanduser()
+            args.download_path = expand_path(Prompt.ask("Enter download path", default=str(args.download_path)))
             save_options(args)
         elif choice == '3':
             min_str = Prompt.ask("Enter min issue number", default=str(args.min) if args.min else "")
@@ -196,7 +282,7 @@ def options_menu(args):
             save_options(args)
         elif choice == '5':
             results_str = Prompt.ask("Enter number of results", default=str(args.results))
-            args.results = int(results_str) if results_str else 15
+            args.results = int(results_str) if results_str else DEFAULT_OPTIONS["results"]
             save_options(args)
         elif choice == '6':
             args.verbose = not args.verbose
@@ -209,26 +295,30 @@ def options_menu(args):
 
 def handle_interrupted_downloads(download_path: Path, verbose: bool):
     console.print(f"[bold green]Scanning for interrupted downloads in {download_path}...[/bold green]")
-    aria2_files = list(download_path.glob("*.aria2"))
+    try:
+        with os.scandir(download_path) as entries:
+            aria2_files = [entry.path for entry in entries if entry.name.endswith(".aria2") and entry.is_file()]
+    except (FileNotFoundError, NotADirectoryError):
+        aria2_files = []  # main() creates the directory on the first download, nothing to resume before that
 
     if not aria2_files:
         console.print("[yellow]No interrupted downloads (.aria2 files) found in this directory.[/yellow]")
         return
 
+    # the list goes to aria2c on stdin, a long argv can hit ARG_MAX
     aria2c_command = [
         "aria2c",
         "--continue",
+        "--input-file=-",
     ]
     if not verbose:
         aria2c_command.append("--quiet")
-    
-    for aria2_file in aria2_files:
-        aria2c_command.append(str(aria2_file))
+    aria2c_input = "\n".join(aria2_files).encode()
 
     try:
         console.print(f"[bold green]Attempting to resume {len(aria2_files)} download(s) using aria2c...[/bold green]")
 
-        subprocess.run(aria2c_command, check=True, cwd=download_path)
+        subprocess.run(aria2c_command, input=aria2c_input, check=True, cwd=download_path)
         console.print("[bold green]aria2c resume process completed.[/bold green]")
     except subprocess.CalledProcessError as e:
         console.print(f"[bold red]aria2c resume failed: {e}[/bold red]")